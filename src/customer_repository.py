@@ -1,5 +1,8 @@
+from functools import lru_cache
 from typing import Optional, Dict, Any
 
+import oracledb
+
 from src.db import get_connection
 
 
@@ -15,55 +18,62 @@ def get_or_create_customer(fields: Dict[str, Any]) -> Optional[int]:
     if not name:
         return None
 
+    return _resolve_customer(name, billing_address, shipping_address)
+
+
+@lru_cache(maxsize=1024)
+def _resolve_customer(
+    name: str,
+    billing_address: Optional[str],
+    shipping_address: Optional[str],
+) -> Optional[int]:
+    """
+    Find or insert the customer row. Cached per process, since the same
+    handful of customers repeat across a batch of invoices.
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
     try:
-        # Try to find an existing customer by name + billing address
+        # Look up by name + billing address and insert when missing, all in a
+        # single round-trip. MERGE can't return the generated key, so this
+        # uses a PL/SQL block with INSERT ... RETURNING instead.
+        customer_id = cursor.var(oracledb.NUMBER)
         cursor.execute(
             """
-            SELECT customer_id
-            FROM customers
-            WHERE name = :name
-              AND (billing_address = :billing_address OR (:billing_address IS NULL AND billing_address IS NULL))
-            FETCH FIRST 1 ROWS ONLY
-            """,
-            {"name": name, "billing_address": billing_address},
-        )
-
-        row = cursor.fetchone()
-        if row:
-            return int(row[0])
-
-        # Insert new customer
-        cursor.execute(
-            """
-            INSERT INTO customers (name, billing_address, shipping_address)
-            VALUES (:name, :billing_address, :shipping_address)
+            BEGIN
+                SELECT customer_id
+                INTO :customer_id
+                FROM customers
+                WHERE name = :name
+                  AND (billing_address = :billing_address OR (:billing_address IS NULL AND billing_address IS NULL))
+                FETCH FIRST 1 ROWS ONLY;
+            EXCEPTION
+                WHEN NO_DATA_FOUND THEN
+                    INSERT INTO customers (name, billing_address, shipping_address)
+                    VALUES (:name, :billing_address, :shipping_address)
+                    RETURNING customer_id INTO :customer_id;
+            END;
             """,
             {
                 "name": name,
                 "billing_address": billing_address,
                 "shipping_address": shipping_address,
+                "customer_id": customer_id,
             },
         )
         conn.commit()
 
-        cursor.execute(
-            """
-            SELECT customer_id
-            FROM customers
-            WHERE name = :name
-            ORDER BY customer_id DESC
-            FETCH FIRST 1 ROWS ONLY
-            """,
-            {"name": name},
-        )
-        row = cursor.fetchone()
-        return int(row[0]) if row else None
+        value = customer_id.getvalue()
+        return int(value) if value is not None else None
 
     finally:
         cursor.close()
         conn.close()
 
 
+def clear_customer_cache() -> None:
+    """
+    Forget cached customer ids, e.g. at the end of a batch run.
+    """
+    _resolve_customer.cache_clear()
@@ -1,11 +1,39 @@
+import atexit
+import threading
+
 import oracledb
 
 # Thin mode (default)
 oracledb.init_oracle_client = None
 
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool():
+    """
+    Create the process-wide session pool on first use.
+    """
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = oracledb.create_pool(
+                    user="SYSTEM",
+                    password="Ravi@123",
+                    dsn="localhost/XEPDB1",
+                    min=2,
+                    max=10,
+                    increment=1,
+                    getmode=oracledb.POOL_GETMODE_WAIT,
+                )
+                atexit.register(_POOL.close)
+    return _POOL
+
+
 def get_connection():
-    return oracledb.connect(
-        user="SYSTEM",
-        password="Ravi@123",
-        dsn="localhost/XEPDB1"
-    )
+    """
+    Acquire a pooled connection. Calling close() on it releases it
+    back to the pool instead of tearing down the session.
+    """
+    return _get_pool().acquire()
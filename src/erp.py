@@ -1,40 +1,54 @@
 import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from src.ocr_engine import extract_text_from_image, extract_text_from_pdf
+from src.db import get_connection
 from src.invoice_parser import parse_invoice_text
 from src.text_parser import extract_line_items
 from src.invoice_repository import insert_invoice
 from src.invoice_items_repository import insert_line_items
-from src.supplier_repository import get_or_create_supplier
-from src.customer_repository import get_or_create_customer
+from src.supplier_repository import get_or_create_supplier, clear_supplier_cache
+from src.customer_repository import get_or_create_customer, clear_customer_cache
 
 
 DEFAULT_INVOICE_DIR = "data/invoices"
 DEFAULT_OUTPUT_DIR = "data/output"
 
+# OCR noise characters removed from detected invoice numbers
+_INVOICE_NUMBER_STRIP = str.maketrans("", "", "—_")
 
-def process_file(input_path: Path, output_dir: Path) -> Optional[str]:
+
+def _ocr_and_parse(
+    input_path: Path, output_dir: Path, pretty: bool = False
+) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
     """
-    Run OCR on a single file and write both raw text and a simple
-    structured JSON sidecar (if we can parse invoice fields).
+    OCR + parse stage: run OCR on a single file, write the raw text and
+    JSON sidecars, and return (fields_dict, line_items) ready to persist.
+    Returns None when the file is skipped or no invoice data was found.
     """
-    print(f"\n📄 Processing: {input_path.name}")
-
+    name = input_path.name
     suffix = input_path.suffix.lower()
-    if suffix in {".png", ".jpg", ".jpeg"}:
-        text = extract_text_from_image(str(input_path))
-    elif suffix == ".pdf":
-        text = extract_text_from_pdf(str(input_path))
-    else:
+
+    print(f"\n📄 Processing: {name}")
+
+    if suffix not in {".png", ".jpg", ".jpeg", ".pdf"}:
         print(f"⚠️ Skipping unsupported file type: {input_path}")
         return None
 
-    output_dir.mkdir(parents=True, exist_ok=True)
+    # Imported lazily: the OCR stack (Tesseract, PDFium, OpenCV) is slow
+    # to load and only needed once there is something to OCR.
+    from src.ocr_engine import extract_text_from_image, extract_text_from_pdf
+
+    if suffix == ".pdf":
+        text = extract_text_from_pdf(str(input_path))
+    else:
+        text = extract_text_from_image(str(input_path))
 
     # Save raw OCR text
-    text_output_path = output_dir / f"{input_path.name}.txt"
+    text_output_path = output_dir / f"{name}.txt"
     with text_output_path.open("w", encoding="utf-8") as f:
         f.write(text)
     print(f"📝 OCR text saved to: {text_output_path}")
@@ -52,12 +66,7 @@ def process_file(input_path: Path, output_dir: Path) -> Optional[str]:
 
     # Clean common OCR artifacts
     if fields.invoice_number:
-        fields.invoice_number = (
-            fields.invoice_number.strip()
-            .replace("—_", "")
-            .replace("—", "")
-            .replace("_", "")
-        )
+        fields.invoice_number = fields.invoice_number.strip().translate(_INVOICE_NUMBER_STRIP)
 
     fields_dict = fields.to_dict()
 
@@ -65,7 +74,7 @@ def process_file(input_path: Path, output_dir: Path) -> Optional[str]:
     for k, v in fields_dict.items():
         print(f"   {k}: {v}")
 
-    json_output_path = output_dir / f"{input_path.name}.json"
+    json_output_path = output_dir / f"{name}.json"
 
     # -----------------------------------
     # ONLY PROCEED IF WE FOUND REAL DATA
@@ -75,16 +84,40 @@ def process_file(input_path: Path, output_dir: Path) -> Optional[str]:
         return None
 
     # Save structured JSON
-    import json
     with json_output_path.open("w", encoding="utf-8") as f:
-        json.dump(fields_dict, f, indent=2, ensure_ascii=False)
+        if pretty:
+            json.dump(fields_dict, f, indent=2, ensure_ascii=False)
+        else:
+            json.dump(fields_dict, f, ensure_ascii=False, separators=(",", ":"))
     print(f"📦 Parsed invoice fields saved to: {json_output_path}")
 
+    # -----------------------------------
+    # EXTRACT LINE ITEMS
+    # -----------------------------------
+    items = extract_line_items(text) if fields.invoice_number else []
+
+    return fields_dict, items
+
+
+def _persist(
+    fields_dict: Dict[str, Any], items: List[Dict[str, Any]], conn=None
+) -> Optional[str]:
+    """
+    DB stage: resolve supplier/customer and insert the invoice header and
+    line items. Returns the invoice number, or None if the header insert failed.
+
+    When ``conn`` is given the inserts join its open transaction and are
+    left for the caller to commit.
+    """
+    commit = conn is None
+    invoice_number = fields_dict.get("invoice_number")
+
     # -----------------------------------
     # RESOLVE SUPPLIER & CUSTOMER
     # -----------------------------------
-    supplier_id = get_or_create_supplier(fields_dict)
-    customer_id = get_or_create_customer(fields_dict)
+    # Skip the lookups (and a pool checkout) when there is no name to match
+    supplier_id = get_or_create_supplier(fields_dict) if fields_dict.get("supplier_name") else None
+    customer_id = get_or_create_customer(fields_dict) if fields_dict.get("customer_name") else None
 
     fields_dict["supplier_id"] = supplier_id
     fields_dict["customer_id"] = customer_id
@@ -93,37 +126,110 @@ def process_file(input_path: Path, output_dir: Path) -> Optional[str]:
     # INSERT INVOICE HEADER
     # -----------------------------------
     try:
-        insert_invoice(fields_dict)
+        insert_invoice(fields_dict, conn=conn, commit=commit)
         print("✅ Invoice header inserted into database")
     except Exception as e:
         print(f"❌ Failed to insert invoice header: {e}")
         return None
 
     # -----------------------------------
-    # EXTRACT & INSERT LINE ITEMS
+    # INSERT LINE ITEMS
     # -----------------------------------
-    if fields.invoice_number:
-        items = extract_line_items(text)
+    if invoice_number:
         if items:
-            insert_line_items(fields.invoice_number, items)
+            insert_line_items(invoice_number, items, conn=conn, commit=commit)
             print(f"🧾 Inserted {len(items)} line items")
         else:
             print("ℹ️ No line items detected")
 
-    return fields.invoice_number
+    return invoice_number
+
+
+def process_file(input_path: Path, output_dir: Path, pretty: bool = False) -> Optional[str]:
+    """
+    Run OCR on a single file and write both raw text and a simple
+    structured JSON sidecar (if we can parse invoice fields).
+
+    The sidecar is written as compact JSON unless ``pretty`` is set.
+    ``output_dir`` must already exist.
+    """
+    parsed = _ocr_and_parse(input_path, output_dir, pretty)
+    if parsed is None:
+        return None
+    return _persist(*parsed)
+
+
+def _init_ocr_worker(page_threads: int) -> None:
+    """
+    Cap the per-page OCR threads in a worker process. ocr_engine reads
+    OCR_CONCURRENCY when it is (lazily) imported, after this has run.
+    """
+    os.environ["OCR_CONCURRENCY"] = str(page_threads)
 
 
-def process_directory(input_dir: Path, output_dir: Path) -> None:
+def process_directory(input_dir: Path, output_dir: Path, pretty: bool = False) -> None:
     """
     Process all supported invoice files in a directory.
+
+    OCR/parsing runs in worker processes while DB writes run on a
+    dedicated thread, so the two stages overlap instead of alternating.
+    All invoices are written on one connection and committed once.
     """
     if not input_dir.exists():
         raise FileNotFoundError(f"Input directory does not exist: {input_dir}")
 
-    for entry in sorted(input_dir.iterdir()):
-        if not entry.is_file():
-            continue
-        process_file(entry, output_dir)
+    files = [entry for entry in sorted(input_dir.iterdir()) if entry.is_file()]
+    if not files:
+        return
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Split the OCR budget between worker processes, so each process's page
+    # thread pool doesn't also assume it has every core to itself.
+    ocr_budget = int(os.environ.get("OCR_CONCURRENCY", os.cpu_count() or 1))
+    ocr_workers = min(len(files), os.cpu_count() or 1)
+    page_threads = max(1, ocr_budget // ocr_workers)
+    conn = get_connection()
+    try:
+        # A single DB thread owns the batch connection
+        with (
+            ProcessPoolExecutor(
+                max_workers=ocr_workers,
+                initializer=_init_ocr_worker,
+                initargs=(page_threads,),
+            ) as ocr_pool,
+            ThreadPoolExecutor(max_workers=1) as db_pool,
+        ):
+            ocr_futures = [
+                ocr_pool.submit(_ocr_and_parse, entry, output_dir, pretty)
+                for entry in files
+            ]
+            # Persist in input order, as the sequential loop did, so insert
+            # and created_at ordering don't depend on which OCR finishes first.
+            db_futures = []
+            for entry, future in zip(files, ocr_futures):
+                try:
+                    parsed = future.result()
+                except Exception as e:
+                    # One unreadable file shouldn't discard the rest of the batch
+                    print(f"❌ Failed to process {entry}: {e}")
+                    continue
+                if parsed is not None:
+                    db_futures.append(db_pool.submit(_persist, *parsed, conn))
+
+            # Drain the DB stage, surfacing any unexpected errors
+            for future in db_futures:
+                future.result()
+    finally:
+        # Keep whatever was written before a failure, as per-invoice
+        # commits used to.
+        try:
+            conn.commit()
+        finally:
+            conn.close()
+
+    clear_supplier_cache()
+    clear_customer_cache()
 
 
 def parse_args() -> argparse.Namespace:
@@ -144,6 +250,11 @@ def parse_args() -> argparse.Namespace:
         default=DEFAULT_OUTPUT_DIR,
         help=f"Directory where OCR output will be written (default: {DEFAULT_OUTPUT_DIR})",
     )
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Pretty-print the JSON sidecar files (useful for debugging)",
+    )
     return parser.parse_args()
 
 
@@ -154,9 +265,10 @@ def main() -> None:
     output_dir = Path(args.output)
 
     if input_path.is_file():
-        process_file(input_path, output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        process_file(input_path, output_dir, pretty=args.pretty)
     else:
-        process_directory(input_path, output_dir)
+        process_directory(input_path, output_dir, pretty=args.pretty)
 
 
 if __name__ == "__main__":
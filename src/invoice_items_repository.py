@@ -1,8 +1,14 @@
 from typing import List, Dict, Any
 
+import oracledb
+
 from src.db import get_connection
 
 
+# Thousand separators, stripped in a single pass
+_NUM_STRIP = str.maketrans("", "", ",")
+
+
 def _to_number(value):
     """
     Convert numeric strings like '135,000.00' to a Python float.
@@ -17,7 +23,7 @@ def _to_number(value):
     if not text:
         return None
 
-    text = text.replace(",", "")
+    text = text.translate(_NUM_STRIP)
 
     try:
         return float(text)
@@ -25,7 +31,7 @@ def _to_number(value):
         return None
 
 
-def insert_line_items(invoice_number, items):
+def insert_line_items(invoice_number, items, conn=None, commit: bool = True):
     """
     Insert multiple invoice line items for a given invoice_number.
 
@@ -34,11 +40,16 @@ def insert_line_items(invoice_number, items):
       - quantity
       - unit_price
       - line_total
+
+    Pass an open ``conn`` with ``commit=False`` to batch several invoices
+    into one transaction; the caller then owns the commit and the connection.
     """
     if not items:
         return
 
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     sql = """
@@ -49,27 +60,51 @@ def insert_line_items(invoice_number, items):
     )
     """
 
+    savepoint_set = False
     try:
-        for item in items:
-            payload = {
+        payloads = [
+            {
                 "invoice_number": invoice_number,
                 "description": item.get("description"),
                 "quantity": _to_number(item.get("quantity", 1)),
                 "unit_price": _to_number(item.get("unit_price")),
                 "line_total": _to_number(item.get("line_total")),
             }
-            cursor.execute(sql, payload)
+            for item in items
+        ]
+
+        if not commit:
+            # Rows before a failing one would otherwise stay in the caller's
+            # transaction; the savepoint keeps this invoice all-or-nothing.
+            # Set it before setinputsizes(), which applies to the next execute.
+            cursor.execute("SAVEPOINT line_items")
+            savepoint_set = True
+
+        # Declare bind types up front so the driver doesn't infer them per row,
+        # then send all rows in a single round-trip.
+        cursor.setinputsizes(
+            description=4000,
+            quantity=oracledb.NUMBER,
+            unit_price=oracledb.NUMBER,
+            line_total=oracledb.NUMBER,
+        )
+        cursor.executemany(sql, payloads)
 
-        conn.commit()
+        if commit:
+            conn.commit()
         print(f"{len(items)} line items inserted for invoice {invoice_number}")
 
     except Exception as e:
-        conn.rollback()
+        if commit:
+            conn.rollback()
+        elif savepoint_set:
+            cursor.execute("ROLLBACK TO SAVEPOINT line_items")
         print("Insert failed:", e)
 
     finally:
         cursor.close()
-        conn.close()
+        if own_conn:
+            conn.close()
 
 
 def get_items_for_invoice(invoice_number: str) -> List[Dict[str, Any]]:
@@ -93,11 +128,15 @@ def get_items_for_invoice(invoice_number: str) -> List[Dict[str, Any]]:
         ORDER BY item_id
     """
 
+    # Fetch items in large batches to keep round-trips down for big invoices
+    cursor.arraysize = 1000
+    cursor.prefetchrows = cursor.arraysize + 1
+
     try:
         cursor.execute(sql, {"invoice_number": invoice_number})
         columns = [col[0].lower() for col in cursor.description]
-        rows = cursor.fetchall()
-        return [dict(zip(columns, row)) for row in rows]
+        cursor.rowfactory = lambda *row: dict(zip(columns, row))
+        return cursor.fetchall()
     finally:
         cursor.close()
         conn.close()
@@ -3,6 +3,10 @@ from typing import List, Dict, Any
 from src.db import get_connection
 
 
+# Thousand separators and percent symbols, stripped in a single pass
+_NUM_STRIP = str.maketrans("", "", ",%")
+
+
 def _to_number(value):
     """
     Convert OCR/parsed numeric strings like '135,000.00' to a Python float.
@@ -18,7 +22,7 @@ def _to_number(value):
         return None
 
     # Remove thousand separators and percent symbols
-    text = text.replace(",", "").replace("%", "")
+    text = text.translate(_NUM_STRIP)
 
     try:
         return float(text)
@@ -26,7 +30,7 @@ def _to_number(value):
         return None
 
 
-def insert_invoice(invoice):
+def insert_invoice(invoice, conn=None, commit: bool = True):
     """
     Insert a single invoice header row into the invoices table.
 
@@ -40,8 +44,13 @@ def insert_invoice(invoice):
         "total_amount": "135,000.00",
         "currency": "Rs."
     }
+
+    Pass an open ``conn`` with ``commit=False`` to batch several invoices
+    into one transaction; the caller then owns the commit and the connection.
     """
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     sql = """
@@ -121,16 +130,21 @@ def insert_invoice(invoice):
         }
 
         cursor.execute(sql, params)
-        conn.commit()
+        if commit:
+            conn.commit()
         print("Invoice inserted:", data.get("invoice_number"))
 
     except Exception as e:
-        conn.rollback()
+        # A failed INSERT is already undone at statement level; only roll
+        # back when we own the transaction, so a batch keeps earlier invoices.
+        if commit:
+            conn.rollback()
         print("Insert failed:", e)
 
     finally:
         cursor.close()
-        conn.close()
+        if own_conn:
+            conn.close()
 
 
 def get_recent_invoices(limit: int = 20) -> List[Dict[str, Any]]:
@@ -163,11 +177,16 @@ def get_recent_invoices(limit: int = 20) -> List[Dict[str, Any]]:
         FETCH FIRST :limit ROWS ONLY
     """
 
+    # The row count is capped by FETCH FIRST, so size the fetch buffers to
+    # pull every row back with the execute round-trip.
+    cursor.arraysize = max(limit, 1)
+    cursor.prefetchrows = cursor.arraysize + 1
+
     try:
         cursor.execute(sql, {"limit": limit})
         columns = [col[0].lower() for col in cursor.description]
-        rows = cursor.fetchall()
-        return [dict(zip(columns, row)) for row in rows]
+        cursor.rowfactory = lambda *row: dict(zip(columns, row))
+        return cursor.fetchall()
     finally:
         cursor.close()
         conn.close()
@@ -214,11 +233,9 @@ def get_invoice_by_number(invoice_number: str) -> Dict[str, Any] | None:
 
     try:
         cursor.execute(sql, {"invoice_number": invoice_number})
-        row = cursor.fetchone()
-        if not row:
-            return None
         columns = [col[0].lower() for col in cursor.description]
-        return dict(zip(columns, row))
+        cursor.rowfactory = lambda *row: dict(zip(columns, row))
+        return cursor.fetchone()
     finally:
         cursor.close()
         conn.close()
@@ -1,34 +1,120 @@
-from typing import Iterable
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
 
-from pdf2image import convert_from_path
-from PIL import Image, ImageOps
+import cv2
+import numpy as np
+from PIL import Image
+import pypdfium2 as pdfium
 import pytesseract
 
+try:
+    import tesserocr
+except ImportError:  # optional: falls back to the pytesseract subprocess
+    tesserocr = None
 
-# Absolute path to your Poppler installation (already installed on your machine)
-POPPLER_PATH = r"C:\poppler-23.08.0\Library\bin"
+
+# Max pages OCR'd concurrently across this process. Tesseract releases the
+# GIL (in-process via tesserocr, or as a pytesseract subprocess), so threads
+# are enough to keep several cores busy.
+OCR_CONCURRENCY = int(os.environ.get("OCR_CONCURRENCY", os.cpu_count() or 1))
+
+DEFAULT_TESSERACT_CONFIG = "--oem 3 --psm 6"
+
+# Shared across calls so worker threads (and their Tesseract engines) persist
+_PAGE_EXECUTOR = ThreadPoolExecutor(max_workers=OCR_CONCURRENCY, thread_name_prefix="ocr")
+
+# Rendered pages allowed to queue up for (or be in) OCR at once per PDF
+_MAX_PAGES_IN_FLIGHT = OCR_CONCURRENCY + 2
+
+_thread_state = threading.local()
+
+# PDFium is not thread-safe, even across separate documents
+_PDFIUM_LOCK = threading.Lock()
+
+
+def _get_tess_api():
+    """
+    Return this thread's persistent tesserocr engine, creating it on first use.
+    Loading the language model is the expensive part, so it is done once per
+    thread instead of once per page; the API object itself isn't thread-safe.
+    """
+    api = getattr(_thread_state, "api", None)
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(
+            psm=tesserocr.PSM.SINGLE_BLOCK,
+            oem=tesserocr.OEM.DEFAULT,
+        )
+        _thread_state.api = api
+    return api
 
 
 def _preprocess_image(image: Image.Image) -> Image.Image:
     """
     Basic preprocessing to improve OCR quality:
     - convert to grayscale
-    - apply automatic contrast enhancement
+    - stretch contrast between the 1st and 99th percentiles
+    - binarize with Otsu's threshold, so Tesseract gets clean 1-bit input
     """
-    gray = ImageOps.grayscale(image)
-    enhanced = ImageOps.autocontrast(gray)
-    return enhanced
+    # PDF pages are already rendered grayscale; only convert others
+    gray = np.asarray(image if image.mode == "L" else image.convert("L"))
+
+    lo, hi = np.percentile(gray, (1, 99))
+    if hi > lo:
+        # Apply the stretch through a 256-entry lookup table, keeping the
+        # image in uint8 instead of materialising a float copy.
+        lut = np.clip((np.arange(256) - lo) * (255.0 / (hi - lo)), 0, 255).astype(np.uint8)
+        gray = cv2.LUT(gray, lut)
+
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return Image.fromarray(binary)
 
 
 def _image_to_text(image: Image.Image, tesseract_config: str | None = None) -> str:
     """
     Run Tesseract on a PIL image with optional configuration.
+
+    Uses an in-process tesserocr engine when available and no custom
+    configuration is requested; otherwise shells out via pytesseract.
     """
     processed = _preprocess_image(image)
-    config = tesseract_config or "--oem 3 --psm 6"
+    config = tesseract_config or DEFAULT_TESSERACT_CONFIG
+
+    if tesserocr is not None and config == DEFAULT_TESSERACT_CONFIG:
+        api = _get_tess_api()
+        api.SetImage(processed)
+        return api.GetUTF8Text()
+
     return pytesseract.image_to_string(processed, config=config)
 
 
+def _iter_pdf_pages(pdf_path: str, dpi: int) -> Iterator[Image.Image]:
+    """
+    Rasterize the pages of a PDF to grayscale PIL images one at a time, so
+    each page can be OCR'd while the next one is still being rendered.
+    """
+    # The lock is taken per PDFium call and never held across a yield, so
+    # other documents can render while this one's consumer waits on OCR.
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        with _PDFIUM_LOCK:
+            page_count = len(pdf)
+        for index in range(page_count):
+            with _PDFIUM_LOCK:
+                page = pdf[index]
+                try:
+                    bitmap = page.render(scale=dpi / 72, grayscale=True)
+                    image = bitmap.to_pil()
+                finally:
+                    page.close()
+            yield image
+    finally:
+        with _PDFIUM_LOCK:
+            pdf.close()
+
+
 def extract_text_from_image(image_path: str, tesseract_config: str | None = None) -> str:
     """
     Read an image from disk and extract text using Tesseract OCR.
@@ -46,11 +132,11 @@ def extract_text_from_image(image_path: str, tesseract_config: str | None = None
 
 def extract_text_from_pdf(
     pdf_path: str,
-    dpi: int = 300,
+    dpi: int = 200,
     tesseract_config: str | None = None,
 ) -> str:
     """
-    Convert each page of a PDF to an image and run Tesseract OCR using Poppler.
+    Render each page of a PDF to an image with PDFium and run Tesseract OCR.
 
     Parameters
     ----------
@@ -58,20 +144,23 @@ def extract_text_from_pdf(
         Path to the PDF file.
     dpi: int
         Resolution used when rasterizing PDF pages. Higher values improve OCR
-        quality at the cost of performance and memory.
+        quality at the cost of performance and memory; 200 is enough for
+        typical invoice text.
     tesseract_config: str | None
         Extra configuration flags passed directly to Tesseract.
     """
-    pages: Iterable[Image.Image] = convert_from_path(
-        pdf_path,
-        dpi=dpi,
-        poppler_path=POPPLER_PATH,
-    )
-
-    full_text_parts: list[str] = []
-    for page in pages:
-        text = _image_to_text(page, tesseract_config=tesseract_config)
-        if text:
-            full_text_parts.append(text.strip())
+    # Hand each page to the OCR pool as soon as it is rendered, but stop
+    # rendering ahead once enough pages are waiting to keep memory bounded.
+    in_flight = threading.BoundedSemaphore(_MAX_PAGES_IN_FLIGHT)
+    futures = []
+    for image in _iter_pdf_pages(pdf_path, dpi):
+        in_flight.acquire()
+        future = _PAGE_EXECUTOR.submit(_image_to_text, image, tesseract_config)
+        future.add_done_callback(lambda _: in_flight.release())
+        futures.append(future)
+
+    # Collect in submission order so the text stays in page order
+    texts = (future.result() for future in futures)
+    full_text_parts = [text.strip() for text in texts if text]
 
     return "\n\n".join(full_text_parts)
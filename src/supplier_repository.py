@@ -1,5 +1,8 @@
+from functools import lru_cache
 from typing import Optional, Dict, Any
 
+import oracledb
+
 from src.db import get_connection
 
 
@@ -16,60 +19,64 @@ def get_or_create_supplier(fields: Dict[str, Any]) -> Optional[int]:
     if not name:
         return None
 
+    return _resolve_supplier(name, email, address, phone)
+
+
+@lru_cache(maxsize=1024)
+def _resolve_supplier(
+    name: str,
+    email: Optional[str],
+    address: Optional[str],
+    phone: Optional[str],
+) -> Optional[int]:
+    """
+    Find or insert the supplier row. Cached per process, since the same
+    vendors repeat across a batch of invoices.
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
     try:
-        # Try to find an existing supplier by name (and email when present)
-        if email:
-            cursor.execute(
-                """
-                SELECT supplier_id
-                FROM suppliers
-                WHERE name = :name AND email = :email
-                FETCH FIRST 1 ROWS ONLY
-                """,
-                {"name": name, "email": email},
-            )
-        else:
-            cursor.execute(
-                """
+        # Look up by name (and email when present) and insert when missing,
+        # all in a single round-trip. MERGE can't return the generated key,
+        # so this uses a PL/SQL block with INSERT ... RETURNING instead.
+        supplier_id = cursor.var(oracledb.NUMBER)
+        cursor.execute(
+            """
+            BEGIN
                 SELECT supplier_id
+                INTO :supplier_id
                 FROM suppliers
                 WHERE name = :name
-                FETCH FIRST 1 ROWS ONLY
-                """,
-                {"name": name},
-            )
-
-        row = cursor.fetchone()
-        if row:
-            return int(row[0])
-
-        # Insert new supplier
-        cursor.execute(
-            """
-            INSERT INTO suppliers (name, address, email, phone)
-            VALUES (:name, :address, :email, :phone)
+                  AND (:email IS NULL OR email = :email)
+                FETCH FIRST 1 ROWS ONLY;
+            EXCEPTION
+                WHEN NO_DATA_FOUND THEN
+                    INSERT INTO suppliers (name, address, email, phone)
+                    VALUES (:name, :address, :email, :phone)
+                    RETURNING supplier_id INTO :supplier_id;
+            END;
             """,
             {
                 "name": name,
                 "address": address,
                 "email": email,
                 "phone": phone,
+                "supplier_id": supplier_id,
             },
         )
         conn.commit()
 
-        cursor.execute(
-            "SELECT supplier_id FROM suppliers WHERE name = :name ORDER BY supplier_id DESC FETCH FIRST 1 ROWS ONLY",
-            {"name": name},
-        )
-        row = cursor.fetchone()
-        return int(row[0]) if row else None
+        value = supplier_id.getvalue()
+        return int(value) if value is not None else None
 
     finally:
         cursor.close()
         conn.close()
 
 
+def clear_supplier_cache() -> None:
+    """
+    Forget cached supplier ids, e.g. at the end of a batch run.
+    """
+    _resolve_supplier.cache_clear()
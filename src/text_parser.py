@@ -2,56 +2,84 @@ import re
 from typing import Optional
 
 
-def normalize(text: str) -> str:
-    return (
-        text.lower()
-        .replace(",", "")
-        .replace("\n", " ")
-        .replace("\t", " ")
+_INVOICE_NUMBER_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"invoice\s*(?:no|number|#)\s*[:\-]?\s*([a-z0-9\-\/]+)",
+        r"bill\s*(?:no|number|#)\s*[:\-]?\s*([a-z0-9\-\/]+)",
+        r"document\s*no\s*[:\-]?\s*([a-z0-9\-\/]+)",
+        r"#\s*(inv[-\s]?\d+)",
+    )
+)
+
+_INVOICE_DATE_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"invoice\s*date\s*[:\-]?\s*([0-9]{2}\s[a-z]{3}\s[0-9]{4})",
+        r"date\s*[:\-]?\s*([0-9]{2}\s[a-z]{3}\s[0-9]{4})",
+        r"([0-9]{4}-[0-9]{2}-[0-9]{2})",
+        r"([0-9]{2}/[0-9]{2}/[0-9]{4})",
     )
+)
+
+_TOTAL_AMOUNT_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"(?:grand\s*total|total\s*amount|amount\s*due|net\s*total)\s*[:\-]?\s*(?:lkr|rs|\$)?\s*([0-9]+\.[0-9]{2})",
+        r"(?:lkr|rs|\$)\s*([0-9]+\.[0-9]{2})",
+    )
+)
+
+# Drop thousand separators and flatten line breaks/tabs, in one pass
+_NORMALIZE_TABLE = str.maketrans({",": None, "\n": " ", "\t": " "})
+
+_SUPPLIER_LABELS = ("from", "supplier", "seller")
+_CUSTOMER_LABELS = ("bill to", "billed to", "customer", "client")
+
+
+def _party_pattern(label: str) -> re.Pattern:
+    return re.compile(rf"{label}\s*[:\-]?\s*([a-z0-9\s\.\,&]+)", re.IGNORECASE)
+
+
+_PARTY_PATTERNS = {
+    label: _party_pattern(label) for label in _SUPPLIER_LABELS + _CUSTOMER_LABELS
+}
+
+
+def normalize(text: str) -> str:
+    return text.translate(_NORMALIZE_TABLE).lower()
 
 
 def find_first(patterns, text) -> Optional[str]:
     for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+        match = pattern.search(text)
         if match:
             return match.group(1).strip()
     return None
 
 
 def extract_invoice_number(text: str) -> Optional[str]:
-    patterns = [
-        r"invoice\s*(?:no|number|#)\s*[:\-]?\s*([a-z0-9\-\/]+)",
-        r"bill\s*(?:no|number|#)\s*[:\-]?\s*([a-z0-9\-\/]+)",
-        r"document\s*no\s*[:\-]?\s*([a-z0-9\-\/]+)",
-        r"#\s*(inv[-\s]?\d+)"
-    ]
-    return find_first(patterns, text)
+    return find_first(_INVOICE_NUMBER_PATTERNS, text)
 
 
 def extract_invoice_date(text: str) -> Optional[str]:
-    patterns = [
-        r"invoice\s*date\s*[:\-]?\s*([0-9]{2}\s[a-z]{3}\s[0-9]{4})",
-        r"date\s*[:\-]?\s*([0-9]{2}\s[a-z]{3}\s[0-9]{4})",
-        r"([0-9]{4}-[0-9]{2}-[0-9]{2})",
-        r"([0-9]{2}/[0-9]{2}/[0-9]{4})"
-    ]
-    return find_first(patterns, text)
+    return find_first(_INVOICE_DATE_PATTERNS, text)
 
 
 def extract_total_amount(text: str) -> Optional[float]:
-    patterns = [
-        r"(?:grand\s*total|total\s*amount|amount\s*due|net\s*total)\s*[:\-]?\s*(?:lkr|rs|\$)?\s*([0-9]+\.[0-9]{2})",
-        r"(?:lkr|rs|\$)\s*([0-9]+\.[0-9]{2})"
-    ]
-    value = find_first(patterns, text)
+    value = find_first(_TOTAL_AMOUNT_PATTERNS, text)
     return float(value) if value else None
 
 
 def extract_party(text: str, labels) -> Optional[str]:
+    # A plain case-insensitive substring check is a cheap prefilter that
+    # skips the regex for labels that can't match.
+    folded = text.lower()
     for label in labels:
-        pattern = rf"{label}\s*[:\-]?\s*([a-z0-9\s\.\,&]+)"
-        match = re.search(pattern, text, re.IGNORECASE)
+        if label.lower() not in folded:
+            continue
+        pattern = _PARTY_PATTERNS.get(label) or _party_pattern(label)
+        match = pattern.search(text)
         if match:
             return match.group(1).strip()
     return None
@@ -64,6 +92,6 @@ def parse_text_fields(raw_text: str) -> dict:
         "invoice_no": extract_invoice_number(text),
         "invoice_date": extract_invoice_date(text),
         "total_amount": extract_total_amount(text),
-        "supplier_name": extract_party(text, ["from", "supplier", "seller"]),
-        "customer_name": extract_party(text, ["bill to", "billed to", "customer", "client"])
+        "supplier_name": extract_party(text, _SUPPLIER_LABELS),
+        "customer_name": extract_party(text, _CUSTOMER_LABELS)
     }
@@ -1,14 +1,23 @@
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+from uuid import uuid4
 
 from flask import (
     Flask,
+    abort,
+    jsonify,
     render_template,
     request,
     redirect,
     url_for,
     flash,
 )
+from werkzeug.utils import secure_filename
 
 from src.main import process_file, DEFAULT_INVOICE_DIR, DEFAULT_OUTPUT_DIR
 from src.invoice_repository import (
@@ -30,11 +39,37 @@ OUTPUT_DIR = BASE_DIR / DEFAULT_OUTPUT_DIR
 app = Flask(__name__, template_folder=str(BASE_DIR / "templates"))
 app.secret_key = "change-this-in-production"
 
+# Caps how many uploads are OCR'd at once across request threads, so
+# concurrent uploads queue up instead of thrashing the CPU with Tesseract.
+_OCR_SEM = threading.BoundedSemaphore(
+    int(os.environ.get("OCR_CONCURRENCY", os.cpu_count() or 1))
+)
+
+# Background OCR jobs, so uploads don't hold the request thread for the
+# whole OCR run. Jobs map to (future, submitted_at); a finished job is dropped
+# when its status is reported, or after _JOB_TTL_SECONDS if nobody polls it.
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="upload")
+_JOBS: Dict[str, Tuple[Future, float]] = {}
+_JOB_TTL_SECONDS = 3600
+
+
+def _prune_jobs() -> None:
+    cutoff = time.monotonic() - _JOB_TTL_SECONDS
+    for job_id, (future, submitted_at) in list(_JOBS.items()):
+        if future.done() and submitted_at < cutoff:
+            _JOBS.pop(job_id, None)
+
+
+def _process_upload(target_path: Path, output_dir: Path) -> str | None:
+    with _OCR_SEM:
+        return process_file(target_path, output_dir)
+
 
 @app.route("/", methods=["GET"])
 def dashboard():
     invoices = get_recent_invoices(limit=20)
     selected_invoice_number = request.args.get("invoice")
+    job_id = request.args.get("job")
     selected_items: List[Dict[str, Any]] = []
     invoice_detail: Dict[str, Any] | None = None
 
@@ -48,6 +83,7 @@ def dashboard():
         selected_invoice_number=selected_invoice_number,
         selected_items=selected_items,
         invoice_detail=invoice_detail,
+        job_id=job_id if job_id in _JOBS else None,
     )
 
 
@@ -62,30 +98,73 @@ def upload_invoice():
         flash("Only PDF files are supported.", "error")
         return redirect(url_for("dashboard"))
 
-    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-    # Save with original filename; production code may want unique names
-    target_path = UPLOAD_DIR / file.filename
-    file.save(target_path)
+    # Strips path components (e.g. "../../x.pdf") so uploads stay in UPLOAD_DIR.
+    # It also drops non-ASCII characters, which can leave nothing of a
+    # Sinhala or CJK name but "pdf"; fall back to a generated name then.
+    filename = secure_filename(file.filename)
+    if not filename.lower().endswith(".pdf"):
+        filename = f"{uuid4().hex}.pdf"
+
+    # Each upload gets its own folder (and sidecar folder), so two uploads of
+    # the same name can't overwrite each other while still queued. Keeping
+    # the original name preserves the stem used as fallback invoice number.
+    upload_id = uuid4().hex
+    upload_dir = UPLOAD_DIR / upload_id
+    output_dir = OUTPUT_DIR / upload_id
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Copy in 1 MiB chunks so large PDFs never sit in memory whole
+    target_path = upload_dir / filename
+    with open(target_path, "wb") as out:
+        shutil.copyfileobj(file.stream, out, length=1024 * 1024)
+
+    # API callers can pass ?sync=1 to keep the blocking behaviour
+    if request.args.get("sync") != "1":
+        _prune_jobs()
+        future = _EXECUTOR.submit(_process_upload, target_path, output_dir)
+        _JOBS[upload_id] = (future, time.monotonic())
+        flash(f"Uploaded {filename}; processing in the background.", "info")
+        return redirect(url_for("dashboard", job=upload_id))
 
     try:
-        invoice_number = process_file(target_path, OUTPUT_DIR)
+        invoice_number = _process_upload(target_path, output_dir)
         if invoice_number:
-            flash(f"Successfully processed {file.filename}", "success")
+            flash(f"Successfully processed {filename}", "success")
             # Redirect focusing on this specific invoice in the UI
             return redirect(url_for("dashboard", invoice=invoice_number))
         else:
             flash(
-                f"Processed {file.filename}, but could not detect any invoice data.",
+                f"Processed {filename}, but could not detect any invoice data.",
                 "error",
             )
     except Exception as exc:  # pragma: no cover - defensive
-        flash(f"Failed to process {file.filename}: {exc}", "error")
+        flash(f"Failed to process {filename}: {exc}", "error")
 
     # Fallback redirect if we couldn't determine an invoice number
     return redirect(url_for("dashboard"))
 
 
+@app.route("/job/<job_id>/status", methods=["GET"])
+def job_status(job_id: str):
+    """
+    Report whether a background upload job has finished, and its outcome.
+    """
+    job = _JOBS.get(job_id)
+    if job is None:
+        abort(404)
+
+    future, _ = job
+    if not future.done():
+        return jsonify(done=False)
+
+    _JOBS.pop(job_id, None)
+    exc = future.exception()
+    if exc is not None:
+        return jsonify(done=True, invoice_number=None, error=str(exc))
+    return jsonify(done=True, invoice_number=future.result(), error=None)
+
+
 @app.route("/invoice/<invoice_number>/delete", methods=["POST"])
 def delete_invoice_route(invoice_number: str):
     """